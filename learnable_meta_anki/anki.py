@@ -1,21 +1,55 @@
+import contextlib
+import hashlib
+import html
 import os
+import shutil
+import threading
+from collections.abc import Iterator
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from urllib.parse import urlparse
+from typing import cast
 
-from bs4.element import Tag
 from genanki.model import Model
 from genanki.deck import Deck
 from genanki.note import Note
 from genanki.package import Package
+import lxml.etree
+import lxml.html
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from tqdm import tqdm
 
-from .scrape import MetaMap, scrape_map
+from .scrape import MetaMap, WebDriverPool, scrape_map
 import logging
 
 from .shared import Config, BASE_URL
 
 logger = logging.getLogger(__name__)
 
+_DOWNLOAD_WORKERS = 16
+_META_WORKERS = 8
+
+# Shared across all downloads (and threads) so keep-alive connections to the image hosts are reused.
+_SESSION = requests.Session()
+_DOWNLOAD_ADAPTER = HTTPAdapter(
+    pool_connections=_DOWNLOAD_WORKERS,
+    pool_maxsize=2 * _DOWNLOAD_WORKERS,
+    max_retries=Retry(total=3, backoff_factor=0.3),
+)
+_SESSION.mount("https://", _DOWNLOAD_ADAPTER)
+_SESSION.mount("http://", _DOWNLOAD_ADAPTER)
+# (connect, read) timeouts for image downloads, in seconds
+_DOWNLOAD_TIMEOUT = (5, 30)
+_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# The download of every image URL seen so far, since the same image can appear in several metas.
+# Metas are processed concurrently, so this is guarded by a lock to make sure each URL is only downloaded once.
+_downloads: dict[str, Future[str | None]] = {}
+_downloads_lock = threading.Lock()
+
+_CUSTOM_IMAGES_DIR = os.path.join("learnable_meta_anki", "images")
+
 CARD_MODEL = Model(
     1425153742,
     "Meta",
@@ -34,60 +68,134 @@ CARD_MODEL = Model(
 )
 
 
-def _remove_class_attributes(html_string: str) -> str:
-    """Cleans up all 'class' attributes from an HTML string."""
-    soup = BeautifulSoup(html_string, "html.parser")
+def _parse_html_fragment(html_string: str) -> lxml.html.HtmlElement:
+    """
+    Parses an HTML fragment into a wrapper 'div' element, so fragments with several top-level nodes survive.
+    """
+    return lxml.html.fragment_fromstring(html_string, create_parent=True)
 
-    for element in soup.find_all(attrs={"class": True}):
-        del element["class"]
 
-    return str(soup)
+def _remove_class_attributes(root: lxml.html.HtmlElement) -> str:
+    """
+    Cleans up all 'class' attributes from a parsed HTML fragment and returns the fragment as an HTML string.
+    Note that this modifies the given tree.
+    """
+    lxml.etree.strip_attributes(root, "class")
+
+    # Only serialize the contents of the wrapper element.
+    leading_text = html.escape(root.text, quote=False) if root.text else ""
+    # With encoding="unicode", tostring returns a str rather than bytes.
+    return leading_text + "".join(cast(str, lxml.html.tostring(child, encoding="unicode")) for child in root)
 
 
-def _download_images(html_string: str, temp_folder: str) -> list[str]:
+def _find_image_urls(root: lxml.html.HtmlElement) -> list[str]:
     """
-    Download all images found in 'img' tags of a given HTML string and stores them in the specified directory.
-    Returns a list of the new file paths on disk.
+    Returns the 'src' of all 'img' tags in a parsed HTML fragment, in document order.
     """
-    # Create temp folder if it doesn't exist
-    os.makedirs(temp_folder, exist_ok=True)
+    return [src for img in root.iter("img") if (src := img.get("src"))]
 
-    soup = BeautifulSoup(html_string, "html.parser")
-    images = soup.find_all("img")
 
-    download_results: list[str] = []
+def _image_filename(img_url: str) -> str:
+    """
+    Derives the filename of a downloaded image from a hash of its URL.
+    This avoids name conflicts between images of different metas and lets identical URLs map to the same file.
+    """
+    name = hashlib.sha1(img_url.encode("utf-8")).hexdigest()[:16]
+    extension = os.path.splitext(urlparse(img_url).path)[1] or ".img"
+    return f"{name}{extension}"
+
 
-    for i, img in enumerate(images):
-        # Get image URL and make it absolute if it's relative
-        if not isinstance(img, Tag):
-            continue
-        src = img.get("src")
-        if not src:
-            continue
+def _deduplicate_by_content(file_path: str) -> str:
+    """
+    Returns the path of a copy of the given file that is named after a hash of its content.
+    Identical images from different URLs thus end up in the same file, and the name doesn't depend on which download
+    finished first, so the notes (and their GUIDs) stay the same between runs.
+    The file named after its URL is kept, so it can be reused by later runs.
+    """
+    with open(file_path, "rb") as f:
+        digest = hashlib.file_digest(f, "blake2b").hexdigest()[:16]
+    content_path = os.path.join(os.path.dirname(file_path), f"{digest}{os.path.splitext(file_path)[1]}")
+    if not os.path.exists(content_path):
+        # Hard link where possible so the copy costs no disk space. If another thread created the same file in the
+        # meantime, it has the same content, so its file is used.
+        try:
+            os.link(file_path, content_path)
+        except FileExistsError:
+            pass
+        except OSError:
+            shutil.copyfile(file_path, content_path)
+    return content_path
 
-        img_url = src
 
-        # Determine filename
-        filename = f"image_{i}_{os.path.basename(img_url)}"
-        if "?" in filename:
-            filename = filename.split("?")[0]
+def _is_up_to_date(img_url: str, file_path: str) -> bool:
+    """
+    Checks with a HEAD request whether an existing file has the size of the remote image.
+    Anything inconclusive counts as outdated, so the image is downloaded again.
+    """
+    try:
+        response = _SESSION.head(img_url, allow_redirects=True, timeout=_DOWNLOAD_TIMEOUT)
+        content_length = response.headers.get("Content-Length")
+        return (
+            response.status_code == 200
+            and content_length is not None
+            and "Content-Encoding" not in response.headers
+            and int(content_length) == os.path.getsize(file_path)
+        )
+    except (requests.RequestException, ValueError, OSError):
+        return False
 
-        file_path = os.path.join(temp_folder, filename)
 
-        # Download the image
-        try:
-            response = requests.get(img_url, stream=True)
-            if response.status_code == 200:
-                with open(file_path, "wb") as f:
-                    for chunk in response.iter_content(1024):
-                        _ = f.write(chunk)
-                download_results.append(file_path)
-            else:
-                logger.error(f"Failed to download {img_url}: Status code {response.status_code}")
-        except Exception as e:
-            logger.error(f"Error downloading {img_url}: {e}")
+def _download_one(img_url: str, file_path: str) -> str | None:
+    """
+    Downloads a single image to the given path.
+    Returns the path on success and None otherwise.
+    If the file already exists (e.g. from a previous run) and still matches the remote image, it is reused instead.
+    The returned path is that of the content-named copy made by _deduplicate_by_content.
+    """
+    if os.path.exists(file_path) and _is_up_to_date(img_url, file_path):
+        return _deduplicate_by_content(file_path)
+    try:
+        response = _SESSION.get(img_url, stream=True, timeout=_DOWNLOAD_TIMEOUT)
+        if response.status_code == 200:
+            # Download to a temporary name first so an interrupted download is never mistaken for a finished one.
+            part_path = f"{file_path}.part"
+            with open(part_path, "wb") as f:
+                for chunk in response.iter_content(_DOWNLOAD_CHUNK_SIZE):
+                    _ = f.write(chunk)
+            os.replace(part_path, file_path)
+            return _deduplicate_by_content(file_path)
+        else:
+            logger.error(f"Failed to download {img_url}: Status code {response.status_code}")
+    except Exception as e:
+        logger.error(f"Error downloading {img_url}: {e}")
+    return None
 
-    return download_results
+
+def _download_images(image_urls: list[str], temp_folder: str, executor: Executor) -> list[str]:
+    """
+    Download all given images and stores them in the specified directory.
+    The downloads are run on the given executor, which is shared by all metas of a package build.
+    Returns a list of the new file paths on disk.
+    """
+    # Create temp folder if it doesn't exist
+    os.makedirs(temp_folder, exist_ok=True)
+
+    downloads: list[tuple[str, str]] = []
+
+    for img_url in image_urls:
+        file_path = os.path.join(temp_folder, _image_filename(img_url))
+        downloads.append((img_url, file_path))
+
+    # Download the images concurrently, each URL only once even if it appears several times or in other metas.
+    futures: list[Future[str | None]] = []
+    with _downloads_lock:
+        for img_url, file_path in downloads:
+            if img_url not in _downloads:
+                _downloads[img_url] = executor.submit(_download_one, img_url, file_path)
+            futures.append(_downloads[img_url])
+
+    # Keep the order (and repetitions) of the images, since select_image refers to images by their position.
+    return [file_path for future in futures if (file_path := future.result()) is not None]
 
 
 def create_anki_cards_from_meta(
@@ -96,10 +204,16 @@ def create_anki_cards_from_meta(
     workdir: str,
     meta_html_content: str,
     meta_name: str,
-) -> tuple[list[Note], list[str]]:
+    download_executor: Executor,
+) -> tuple[Iterator[Note], list[str]]:
+    """
+    Creates the notes for a single meta, one for each question image.
+    The notes are created lazily while iterating, but the images are downloaded right away.
+    """
     # TODO: render images in answer offline
-    cards: list[Note] = []
-    content_images = _download_images(meta_html_content, workdir)
+    # The meta's HTML is parsed only once; the same tree is used to find the images and to build the answer.
+    meta_root = _parse_html_fragment(meta_html_content)
+    content_images = _download_images(_find_image_urls(meta_root), workdir, download_executor)
     media_files = content_images
     if meta_name in config.custom_image:
         custom_image = config.custom_image[meta_name]
@@ -114,17 +228,25 @@ def create_anki_cards_from_meta(
             question_images = []
     else:
         question_images = content_images
-    for image in question_images:
-        note = Note(
-            model=CARD_MODEL,
-            fields=[
-                meta_name,
-                f"<img src={os.path.basename(image)}>",
-                _remove_class_attributes(meta_html_content),
-            ],
-        )
-        cards.append(note)
-    return cards, media_files
+    # The same image appearing several times in a meta would give identical notes, so each one is only used once.
+    question_images = list(dict.fromkeys(question_images))
+
+    def notes() -> Iterator[Note]:
+        # The answer is the same for every card, so it's cleaned up only once (and not at all without cards).
+        if not question_images:
+            return
+        answer_html = _remove_class_attributes(meta_root)
+        for image in question_images:
+            yield Note(
+                model=CARD_MODEL,
+                fields=[
+                    meta_name,
+                    f"<img src={os.path.basename(image)}>",
+                    answer_html,
+                ],
+            )
+
+    return notes(), media_files
 
 
 def create_anki_deck(
@@ -133,27 +255,37 @@ def create_anki_deck(
     metas: dict[str, str],
     config: Config,
     workdir: str,
+    download_executor: Executor,
 ) -> tuple[Deck, list[str]]:
     """
     Creates a deck for a given meta map.
     """
     deck_description = f"{meta_map.description}\n\nCreated from {BASE_URL} using github.com/atollk/geoguessr-scripts."
     deck = Deck(
-        deck_id=hash(meta_map.name),
+        # hash() is salted per process, so derive the ID from a real hash to keep it stable between runs.
+        deck_id=int(hashlib.md5(meta_map.name.encode("utf-8")).hexdigest()[:15], 16),
         name=f"Learnable Meta::{meta_map.name}",
         description=deck_description,
     )
-    new_media_files = []
-    for meta_name, html_string in tqdm(metas.items()):
-        notes, media_files = create_anki_cards_from_meta(
+    new_media_files: list[str] = []
+
+    def create_cards(meta: tuple[str, str]) -> tuple[Iterator[Note], list[str]]:
+        meta_name, html_string = meta
+        return create_anki_cards_from_meta(
             config=config,
             workdir=workdir,
             meta_html_content=html_string,
             meta_name=meta_name,
+            download_executor=download_executor,
         )
-        for note in notes:
-            deck.add_note(note)
-        new_media_files += media_files
+
+    # Metas are prepared concurrently so the image downloads of all metas overlap, rather than waiting for each meta's
+    # downloads before starting the next one. Notes are still added to the deck in order, on this thread.
+    with ThreadPoolExecutor(max_workers=_META_WORKERS) as meta_executor:
+        for notes, media_files in tqdm(meta_executor.map(create_cards, metas.items()), total=len(metas)):
+            for note in notes:
+                deck.add_note(note)
+            new_media_files.extend(media_files)
     return deck, new_media_files
 
 
@@ -162,28 +294,52 @@ def create_anki_package(
     workdir: str,
     config: Config,
     map_list: list[MetaMap],
+    download_workers: int = _DOWNLOAD_WORKERS,
+    use_cache: bool = True,
+    driver_pool: WebDriverPool | None = None,
 ) -> Package:
+    """
+    Creates the package with one deck per map.
+    download_workers is the number of images downloaded in parallel; with 1, images are downloaded one after another.
+    use_cache=False ignores previously scraped maps cached on disk.
+    Maps are scraped with drivers from driver_pool, so browsers started earlier can be reused; without one, a pool
+    is created just for this package.
+    """
     package = Package([])
-    package.media_files = list(
-        {
-            os.path.join("learnable_meta_anki", "images", i)
-            for v in config.custom_image.values()
-            for i in (v if isinstance(v, list) else [v])
-        }
-    )
+    # Collected as a set since the same image can be used by several metas and maps.
+    media_files: set[str] = set()
+    if config.custom_image:
+        # List the custom images once instead of checking each configured file separately.
+        custom_image_paths = {entry.name: entry.path for entry in os.scandir(_CUSTOM_IMAGES_DIR) if entry.is_file()}
+        for v in config.custom_image.values():
+            for i in v if isinstance(v, list) else [v]:
+                if i not in custom_image_paths:
+                    # Fail before scraping anything rather than building a package with broken cards.
+                    raise FileNotFoundError(f"Custom image {i} not found in {_CUSTOM_IMAGES_DIR}")
+                media_files.add(custom_image_paths[i])
 
-    for i, meta_map in enumerate(map_list):
-        logger.info(f"Crawling {meta_map.name}...")
-        metas = scrape_map(meta_map)
-        logger.info(f"Creating deck {meta_map.name} ({i + 1} / {len(map_list)}) ...")
-        deck, media_files = create_anki_deck(
-            meta_map=meta_map,
-            metas=metas,
-            config=config,
-            workdir=workdir,
-        )
-        package.media_files += media_files
-        package.decks.append(deck)
-        # TODO: handle name conflicts in downloaded files
+    pool_context = contextlib.nullcontext(driver_pool) if driver_pool else WebDriverPool()
+
+    # Maps are scraped concurrently, but decks are built one after another since genanki is not thread-safe.
+    with (
+        pool_context as pool,
+        ThreadPoolExecutor(max_workers=max(1, min(pool.size, len(map_list)))) as scrape_executor,
+        ThreadPoolExecutor(max_workers=download_workers) as download_executor,
+    ):
+        logger.info(f"Crawling {len(map_list)} maps...")
+        scrape_futures = [scrape_executor.submit(scrape_map, meta_map, pool, use_cache) for meta_map in map_list]
+        for i, (meta_map, scrape_future) in enumerate(zip(map_list, scrape_futures)):
+            metas = scrape_future.result()
+            logger.info(f"Creating deck {meta_map.name} ({i + 1} / {len(map_list)}) ...")
+            deck, deck_media_files = create_anki_deck(
+                meta_map=meta_map,
+                metas=metas,
+                config=config,
+                workdir=workdir,
+                download_executor=download_executor,
+            )
+            media_files.update(deck_media_files)
+            package.decks.append(deck)
 
+    package.media_files = list(media_files)
     return package
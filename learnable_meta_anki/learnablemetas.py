@@ -9,7 +9,7 @@ import fnmatch
 from . import anki, scrape
 import logging
 
-from .shared import Config, BASE_URL
+from .shared import Config, BASE_URL, CACHE_DIR
 
 
 class CustomFormatter(logging.Formatter):
@@ -33,6 +33,15 @@ logger = logging.getLogger(__name__)
 class CliArgs:
     config: str
     include_maps: str
+    download_workers: int
+    no_cache: bool
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
 
 
 def _parse_cli_args(args: list[str]) -> CliArgs:
@@ -49,8 +58,19 @@ def _parse_cli_args(args: list[str]) -> CliArgs:
         default="*",
         help="Filter by map name (supports wildcards)",
     )
+    parser.add_argument(
+        "--download_workers",
+        type=_positive_int,
+        default=anki._DOWNLOAD_WORKERS,
+        help="Number of images to download in parallel (1 downloads them one after another)",
+    )
+    parser.add_argument(
+        "--no_cache",
+        action="store_true",
+        help="Scrape all maps and download all images again instead of using the cached results of previous runs",
+    )
     parsed = parser.parse_args(args)
-    return CliArgs(parsed.config, parsed.include_maps)
+    return CliArgs(parsed.config, parsed.include_maps, parsed.download_workers, parsed.no_cache)
 
 
 def main(raw_args: list[str]) -> None:
@@ -58,16 +78,22 @@ def main(raw_args: list[str]) -> None:
 
     config = Config(**json.load(open(args.config, "r")))
 
-    logger.info("Loading map list")
-    map_list = scrape.load_map_list(os.path.join(BASE_URL, "maps"))
-    map_list = [map_item for map_item in map_list if fnmatch.fnmatch(map_item.name, args.include_maps)]
+    # One pool of browsers for the whole run, so the browser loading the map list is reused for scraping the maps.
+    with scrape.WebDriverPool() as driver_pool, tempfile.TemporaryDirectory() as tempdir:
+        logger.info("Loading map list")
+        map_list = scrape.load_map_list(os.path.join(BASE_URL, "maps"), driver_pool)
+        map_list = [map_item for map_item in map_list if fnmatch.fnmatch(map_item.name, args.include_maps)]
 
-    with tempfile.TemporaryDirectory() as tempdir:
+        # Images are named after their URL, so keeping them in the cache lets later runs skip downloading them again.
+        workdir = tempdir if args.no_cache else os.path.join(CACHE_DIR, "images")
         logger.info("Creating Anki package")
         package = anki.create_anki_package(
-            workdir=tempdir,
+            workdir=workdir,
             map_list=map_list,
             config=config,
+            download_workers=args.download_workers,
+            use_cache=not args.no_cache,
+            driver_pool=driver_pool,
         )
         logger.info("Writing package file")
         package.write_to_file("learnable_meta.apkg")
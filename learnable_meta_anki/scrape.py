@@ -1,24 +1,35 @@
 import contextlib
 import dataclasses
 import html
+import json
 import re
+import tempfile
+import threading
+import time
 from typing import Any, Generator
 
-import selenium.webdriver.remote.webelement
-import selenium.webdriver.remote.webdriver
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.element import Tag
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.firefox.webdriver import WebDriver
 from selenium.webdriver.support import expected_conditions as ec
 from selenium.webdriver.support.wait import WebDriverWait
-from tqdm import tqdm
 
 import os.path
-from .shared import BASE_URL
+from .shared import BASE_URL, CACHE_DIR
 import logging
 
 logger = logging.getLogger(__name__)
 
+_MAP_ID_RE = re.compile(r"maps/([a-zA-Z0-9]+)")
+_HTML_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+_MAP_CARD_STRAINER = SoupStrainer("div", attrs={"data-slot": "card"})
+
+# Scraped metas are cached per map in CACHE_DIR, for at most _CACHE_MAX_AGE seconds.
+_CACHE_MAX_AGE = 24 * 60 * 60
+
 
 @dataclasses.dataclass
 class MetaMap:
@@ -29,24 +40,75 @@ class MetaMap:
     difficulty: str
 
 
-def _string_to_xpath_expr(string: str) -> str:
-    # XPath doesn't have string escaping so we need to be creative.
-    if "'" in string:
-        parts = string.split("'")
-        joined_parts = ', "\'", '.join(f"'{p}'" for p in parts)
-        xpath_meta_name = f"concat({joined_parts})"
-    else:
-        xpath_meta_name = f"'{string}'"
-    return xpath_meta_name
-
-
-def _get_raw_html_text(element: selenium.webdriver.remote.webelement.WebElement) -> str:
+# The div that shows the contents of the currently selected meta.
+# An XPath matching both the map and the meta name would be nicer, but this works for now.
+_META_CONTENT_SELECTOR = "div.overflow-hidden.flex.flex-col"
+# How long to wait for the content div to update after clicking a meta, in milliseconds.
+_META_CONTENT_WAIT_MS = 1000
+_SCRAPE_METAS_TIMEOUT = 600
+
+# Clicks every meta row of the table and collects the contents div for each of them.
+# Called via execute_async_script with the content selector and the per-meta wait as arguments.
+_SCRAPE_METAS_JS = """
+const [contentSelector, waitMs, done] = arguments;
+const metas = {};
+const errors = [];
+
+// Resolves as soon as the DOM changes to show a different content div, or with the current one after waitMs.
+const waitForContent = (previousHtml) => new Promise((resolve) => {
+    const changedContent = () => {
+        const content = document.querySelector(contentSelector);
+        return content && content.outerHTML !== previousHtml ? content : null;
+    };
+    const content = changedContent();
+    if (content) {
+        resolve(content);
+        return;
+    }
+    const finish = (content) => {
+        observer.disconnect();
+        clearTimeout(timeout);
+        resolve(content);
+    };
+    const observer = new MutationObserver(() => {
+        const content = changedContent();
+        if (content) {
+            finish(content);
+        }
+    });
+    const timeout = setTimeout(() => finish(document.querySelector(contentSelector)), waitMs);
+    observer.observe(document.body, {childList: true, subtree: true, characterData: true, attributes: true});
+});
+
+(async () => {
+    const rows = [...document.querySelectorAll("td")].filter((td) => !td.querySelector("button"));
+    for (const td of rows) {
+        try {
+            const title = td.querySelector("span.whitespace-normal");
+            if (!title) {
+                throw new Error("Unable to locate the meta title in table cell");
+            }
+            const previousHtml = document.querySelector(contentSelector)?.outerHTML;
+            td.click();
+            const content = await waitForContent(previousHtml);
+            metas[title.innerText] = content ? content.outerHTML : null;
+        } catch (e) {
+            errors.push(String(e));
+        }
+    }
+    done({metas, errors});
+})();
+"""
+
+
+def _get_raw_html_text(inner_html: str) -> str:
     # Since we are using this value in Xpath later, it needs to be HTML-accurate, not the rendered text.
-    return html.unescape(re.sub(r"<!--.*?-->", "", element.get_attribute("innerHTML"), flags=re.DOTALL))
+    return html.unescape(_HTML_COMMENT_RE.sub("", inner_html))
 
 
-@contextlib.contextmanager
-def _webdriver() -> Generator[WebDriver, Any, None]:
+def _create_webdriver() -> WebDriver:
+    # Images are not loaded by the browser since only the HTML is scraped; they are downloaded separately later.
+    # For the same reason, pages only need to be interactive ("eager"), every lookup afterwards uses an explicit wait.
     # try to use Chrome and fall back to Firefox
     try:
         raise Exception("Chrome doesn't work with Learnable Metas at the moment.")
@@ -54,23 +116,110 @@ def _webdriver() -> Generator[WebDriver, Any, None]:
         options.add_argument("--headless=new")
         options.add_argument("--no-sandbox")
         options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.page_load_strategy = "eager"
         driver = webdriver.Chrome(options=options)
     except Exception as e:
         logger.warning(f"Failed to initialize Chrome driver: {e}. Falling back to Firefox.")
         options = webdriver.FirefoxOptions()
         options.add_argument("--headless")
+        options.set_preference("permissions.default.image", 2)
+        options.page_load_strategy = "eager"
         driver = webdriver.Firefox(options=options)
+    return driver
+
+
+@contextlib.contextmanager
+def _webdriver() -> Generator[WebDriver, Any, None]:
+    driver = _create_webdriver()
     try:
-        driver.implicitly_wait(time_to_wait=1)
         yield driver
     finally:
         driver.quit()
 
 
-def load_map_list(base_url: str) -> list[MetaMap]:
+class WebDriverPool:
     """
-    Extracts a list of all available maps from the learnable metas site.
-    base_url is the URL of the "Maps" page.
+    A fixed-size pool of webdrivers that can be shared between threads.
+    Drivers are started lazily and reused until the pool is closed, so the browser startup is only paid once per driver.
+    """
+
+    def __init__(self, size: int = 4) -> None:
+        self._size = size
+        # Guards the state below; waiting threads are notified whenever a driver or a free slot becomes available.
+        self._available = threading.Condition()
+        self._num_started = 0
+        self._started: list[WebDriver] = []
+        self._idle: list[WebDriver] = []
+
+    def __enter__(self) -> "WebDriverPool":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @contextlib.contextmanager
+    def driver(self) -> Generator[WebDriver, Any, None]:
+        """
+        Borrows a driver from the pool, blocking until one is available.
+        If the borrower raises, the driver may be broken (e.g. its session crashed), so it is discarded instead of
+        being handed out again; the pool starts a new one when needed.
+        """
+        driver = self._acquire()
+        healthy = False
+        try:
+            yield driver
+            healthy = True
+        finally:
+            self._release(driver, healthy)
+
+    def _acquire(self) -> WebDriver:
+        with self._available:
+            while not self._idle and self._num_started >= self._size:
+                self._available.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._num_started += 1
+
+        # Start the browser outside the lock so multiple drivers can warm up in parallel.
+        try:
+            driver = _create_webdriver()
+        except Exception:
+            with self._available:
+                self._num_started -= 1
+                # Let a waiting thread retry the start in the freed slot.
+                self._available.notify()
+            raise
+        with self._available:
+            self._started.append(driver)
+        return driver
+
+    def _release(self, driver: WebDriver, healthy: bool) -> None:
+        with self._available:
+            if healthy:
+                self._idle.append(driver)
+            elif driver in self._started:
+                self._started.remove(driver)
+                self._num_started -= 1
+            self._available.notify()
+        if not healthy:
+            with contextlib.suppress(Exception):
+                driver.quit()
+
+    def close(self) -> None:
+        with self._available:
+            drivers, self._started, self._idle = self._started, [], []
+        for driver in drivers:
+            driver.quit()
+
+
+def _parse_map_list(page_html: str) -> list[MetaMap]:
+    """
+    Extracts all maps from the HTML of the "Maps" page.
     """
 
     def extract_map_id(href: str) -> str | None:
@@ -78,66 +227,138 @@ def load_map_list(base_url: str) -> list[MetaMap]:
             return None
 
         # Extract the map ID from URLs like "https://www.geoguessr.com/maps/66fda352ee1c8ee4735e1aa8"
-        match = re.search(r"maps/([a-zA-Z0-9]+)", href)
+        match = _MAP_ID_RE.search(href)
         if match:
             return match.group(1)
         return None
 
-    with _webdriver() as driver:
+    def select(container: Tag, selector: str) -> Tag:
+        element = container.select_one(selector)
+        if element is None:
+            raise ValueError(f"Unable to locate {selector} in map card")
+        return element
+
+    # Only the map cards are needed, so the rest of the page isn't even turned into a tree.
+    soup = BeautifulSoup(page_html, "lxml", parse_only=_MAP_CARD_STRAINER)
+
+    # Find all map containers
+    map_containers = soup.select("div[data-slot=card]")
+
+    maps_data = []
+    for container in map_containers:
+        # Extract name
+        name_element = select(container, "[data-slot=card-title]")
+        name = _get_raw_html_text(name_element.decode_contents())
+
+        # Extract author
+        author_element = select(container, "[data-slot=card-description]")
+        author = author_element.get_text().strip()
+
+        # Extract description
+        description_element = select(container, "div[data-slot=card-content]")
+        description = description_element.get_text().strip()
+
+        # Extract difficulty
+        # difficulty_element = container.select_one("svg.iconify--carbon").parent
+        # difficulty = difficulty_element.get_text().strip()
+        difficulty = "?"
+
+        # Extract map_id from play link
+        play_link = select(container, "a[href*='maps/']")
+        href = str(play_link.get("href", ""))
+        map_id = extract_map_id(href)
+
+        maps_data.append(
+            {
+                "name": name,
+                "author": author,
+                "description": description,
+                "map_id": map_id,
+                "difficulty": difficulty,
+            }
+        )
+
+    return [MetaMap(**x) for x in maps_data]
+
+
+def load_map_list(base_url: str, driver_pool: WebDriverPool | None = None) -> list[MetaMap]:
+    """
+    Extracts a list of all available maps from the learnable metas site.
+    base_url is the URL of the "Maps" page.
+    The page is fetched without a browser if possible; the webdriver is only used if that yields no maps
+    (e.g. because the page is rendered client-side or an anti-bot check kicked in).
+    If a driver pool is given, a driver is borrowed from it rather than starting a new browser.
+    """
+    try:
+        response = requests.get(base_url, timeout=30)
+        response.raise_for_status()
+        map_list = _parse_map_list(response.text)
+        if map_list:
+            return map_list
+        logger.info("No maps found in the static page, falling back to the webdriver.")
+    except Exception as e:
+        logger.warning(f"Failed to load the map list without a browser: {e}. Falling back to the webdriver.")
+
+    driver_context = driver_pool.driver() if driver_pool else _webdriver()
+    with driver_context as driver:
         driver.get(base_url)
+        WebDriverWait(driver, 10).until(ec.presence_of_element_located((By.CSS_SELECTOR, "div[data-slot=card]")))
 
-        # Find all map containers
-        map_containers = driver.find_elements(
-            By.CSS_SELECTOR,
-            "div[data-slot=card]",
-        )
+        # Read the rendered page once and extract everything locally rather than querying each card via WebDriver.
+        page_html = driver.page_source
 
-        maps_data = []
-        for container in tqdm(map_containers):
-            # Extract name
-            name_element = container.find_element(By.CSS_SELECTOR, "[data-slot=card-title]")
-            name = _get_raw_html_text(name_element)
-
-            # Extract author
-            author_element = container.find_element(By.CSS_SELECTOR, "[data-slot=card-description]")
-            author = author_element.text
-
-            # Extract description
-            description_element = container.find_element(By.CSS_SELECTOR, "div[data-slot=card-content]")
-            description = description_element.text
-
-            # Extract difficulty
-            # difficulty_element = container.find_element(By.XPATH,
-            #                                            ".//svg[contains(@class, 'iconify--carbon')]/parent::div")
-            # difficulty = difficulty_element.text.strip()
-            difficulty = "?"
-
-            # Extract map_id from play link
-            play_link = container.find_element(By.CSS_SELECTOR, "a[href*='maps/']")
-            href = play_link.get_attribute("href")
-            map_id = extract_map_id(href)
-
-            maps_data.append(
-                {
-                    "name": name,
-                    "author": author,
-                    "description": description,
-                    "map_id": map_id,
-                    "difficulty": difficulty,
-                }
-            )
+    return _parse_map_list(page_html)
 
-    return [MetaMap(**x) for x in maps_data]
+
+def _cache_path(meta_map: MetaMap) -> str:
+    return os.path.join(CACHE_DIR, f"{meta_map.map_id}.json")
 
 
-def scrape_map(meta_map: MetaMap) -> dict[str, str]:
+def _load_cached_metas(meta_map: MetaMap) -> dict[str, str] | None:
+    """
+    Returns the cached scrape result for a map, or None if there is none or it's outdated.
+    """
+    cache_path = _cache_path(meta_map)
+    try:
+        if time.time() - os.path.getmtime(cache_path) > _CACHE_MAX_AGE:
+            return None
+        with open(cache_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _store_cached_metas(meta_map: MetaMap, metas: dict[str, str]) -> None:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Write to a temporary file first so an interrupted run never leaves a truncated cache file behind.
+    fd, temp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(metas, f)
+        os.replace(temp_path, _cache_path(meta_map))
+    except OSError as e:
+        logger.warning(f"Failed to cache the metas of {meta_map.name}: {e}")
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+
+
+def scrape_map(meta_map: MetaMap, driver_pool: WebDriverPool | None = None, use_cache: bool = True) -> dict[str, str]:
     """
     Extracts a list of all metas from a single list.
     Returns a dict which maps meta names to their HTML content.
+    If a driver pool is given, a driver is borrowed from it rather than starting a new browser.
+    Results are cached on disk for a day; with use_cache=False, the map is always scraped (and the cache refreshed).
     """
+    if use_cache:
+        cached = _load_cached_metas(meta_map)
+        if cached is not None:
+            logger.info(f"Using cached metas for {meta_map.name}")
+            return cached
+
     result: dict[str, str] = {}
 
-    with _webdriver() as driver:
+    driver_context = driver_pool.driver() if driver_pool else _webdriver()
+    with driver_context as driver:
         # Navigate to the URL
         url = os.path.join(BASE_URL, "maps", meta_map.map_id)
         driver.get(url)
@@ -145,38 +366,23 @@ def scrape_map(meta_map: MetaMap) -> dict[str, str]:
         # Wait for the content to load
         WebDriverWait(driver, 5).until(ec.presence_of_element_located((By.TAG_NAME, "table")))
 
-        # Find all td elements
-        td_elements = [
-            td for td in driver.find_elements(By.TAG_NAME, "td") if len(td.find_elements(By.TAG_NAME, "button")) == 0
-        ]
-
-        # Click on each td element and process the results
-        for td in tqdm(td_elements):
-            try:
-                td_title = td.find_element(By.CSS_SELECTOR, "span.whitespace-normal")
-                td_text = td_title.text
-
-                # Click the td element
-                td.click()
-
-                # Find the div with main contents
-                xpath_meta_name = _string_to_xpath_expr(td_text)
-                xpath_map_name = _string_to_xpath_expr(meta_map.name)
-
-                # xpath_condition = f"[node()[contains(., {xpath_map_name})] and node()[contains(., {xpath_meta_name})]]"
-                # xpath = f"//*{xpath_condition}[not(./descendant::*{xpath_condition})]/div[not(./descendant::h1)]"
-                # target_div = driver.find_element(By.XPATH, xpath)
-
-                # temp solution but the above one would be nicer
-                target_div = driver.find_element(By.CSS_SELECTOR, "div.overflow-hidden.flex.flex-col")
+        # Clicking through the rows happens entirely in the browser, so the whole table costs a single round-trip
+        # instead of several WebDriver commands per meta.
+        driver.set_script_timeout(_SCRAPE_METAS_TIMEOUT)
+        scraped: dict[str, Any] = driver.execute_async_script(
+            _SCRAPE_METAS_JS,
+            _META_CONTENT_SELECTOR,
+            _META_CONTENT_WAIT_MS,
+        )
 
-                # Store the data in our result list
-                outer_html = target_div.get_attribute("outerHTML")
-                if outer_html:
-                    result[td_text] = outer_html
-                else:
-                    logger.warning(f"No outer HTML found for {td_text}")
-            except Exception as e:
-                logger.warning(str(e))
+        for td_text, outer_html in scraped["metas"].items():
+            if outer_html:
+                result[td_text] = outer_html
+            else:
+                logger.warning(f"No outer HTML found for {td_text}")
+        for error in scraped["errors"]:
+            logger.warning(error)
 
+    if result:
+        _store_cached_metas(meta_map, result)
     return result
@@ -1,6 +1,8 @@
 import dataclasses
 
 BASE_URL = "https://learnablemeta.com/"
+# Scraped maps and downloaded images are kept here between runs.
+CACHE_DIR = ".cache"
 
 
 @dataclasses.dataclass
@@ -8,13 +8,51 @@ import time
 import json
 import re
 import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urljoin
 
 
+# Extracts the subpage path from a country row's onclick handler
+ONCLICK_RE = re.compile(r"window\.open\('([^']+)'")
+
+# Scrolls from the current position to the bottom of the page in steps of 1/4 of the viewport, one step per animation
+# frame, so lazy-loaded content gets triggered along the way without a fixed pause after each step.
+# Also stops once the window hasn't scrolled any further for a few frames, since it may not be able to reach the bottom
+# (e.g. if the page scrolls in an inner container, or the content shrinks while scrolling).
+SCROLL_THROUGH_PAGE_JS = """
+const done = arguments[arguments.length - 1];
+// The resource timing buffer holds 250 entries by default; make sure it doesn't fill up while waiting for resources.
+performance.setResourceTimingBufferSize(100000);
+const step = window.innerHeight / 4;
+const maxStalledFrames = 10;
+let lastOffset = window.pageYOffset;
+let stalledFrames = 0;
+const scroll = () => {
+    const bottom = document.body.scrollHeight;
+    const next = Math.min(window.pageYOffset + step, bottom);
+    window.scrollTo(0, next);
+    stalledFrames = window.pageYOffset > lastOffset ? 0 : stalledFrames + 1;
+    lastOffset = window.pageYOffset;
+    if (next >= bottom - window.innerHeight || stalledFrames >= maxStalledFrames) {
+        done();
+    } else {
+        requestAnimationFrame(scroll);
+    }
+};
+scroll();
+"""
+
+
 class GeoGuessrScraper:
-    def __init__(self, output_dir="pdfs"):
+    def __init__(self, output_dir="pdfs", max_workers=6):
         """Initialize the scraper with configuration."""
         self.output_dir = output_dir
+        # Number of country pages processed in parallel, each with its own Chrome instance
+        self.max_workers = max_workers
+        self._workers = threading.local()
+        self._worker_scrapers = []
+        self._worker_scrapers_lock = threading.Lock()
         self.options = webdriver.ChromeOptions()
         self.options.add_argument("--headless")
         self.options.add_argument("--disable-gpu")
@@ -43,6 +81,22 @@ class GeoGuessrScraper:
         self.driver = webdriver.Chrome(options=self.options)
         return self.driver
 
+    def wait_for_resources(self, settle_time, timeout=10):
+        """Wait until the page has stopped loading new resources for settle_time seconds."""
+        last_count = None
+
+        def settled(driver):
+            nonlocal last_count
+            count = driver.execute_script("return performance.getEntriesByType('resource').length")
+            unchanged = count == last_count
+            last_count = count
+            return unchanged
+
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=settle_time).until(settled)
+        except TimeoutException:
+            pass
+
     def scroll_to_bottom(self, pause_time=1.0):
         """Smoothly scroll through the page to load all dynamic content."""
         print("Scrolling through page to load dynamic content...")
@@ -51,23 +105,11 @@ class GeoGuessrScraper:
         last_height = self.driver.execute_script("return document.body.scrollHeight")
 
         while True:
-            # Calculate current viewport height
-            viewport_height = self.driver.execute_script("return window.innerHeight")
-            total_height = self.driver.execute_script("return document.body.scrollHeight")
-            current_position = self.driver.execute_script("return window.pageYOffset")
-
-            # Scroll in smaller increments (1/4 of viewport) for smoother loading
-            scroll_increment = viewport_height / 4
-
-            # Scroll until we reach bottom
-            while current_position < total_height:
-                next_position = min(current_position + scroll_increment, total_height)
-                self.driver.execute_script(f"window.scrollTo(0, {next_position})")
-                time.sleep(pause_time / 2)  # Shorter pause for incremental scrolls
-                current_position = next_position
+            # Scroll in smaller increments (1/4 of viewport) for smoother loading, within a single script call
+            self.driver.execute_async_script(SCROLL_THROUGH_PAGE_JS)
 
             # Wait for potential dynamic content to load
-            time.sleep(pause_time)
+            self.wait_for_resources(pause_time)
 
             # Check if page height has changed
             new_height = self.driver.execute_script("return document.body.scrollHeight")
@@ -87,23 +129,28 @@ class GeoGuessrScraper:
             # Scroll through page to load all dynamic content
             self.scroll_to_bottom(pause_time=0.1)
 
-            # Find all table rows with country data
-            rows = self.driver.find_elements(By.CLASS_NAME, "mdb-table-row")
+            # Read all table rows with country data in a single round-trip instead of several per row
+            rows = self.driver.execute_script(
+                """
+                return Array.from(document.getElementsByClassName("mdb-table-row")).map(row => ({
+                    onclick: row.getAttribute("onclick"),
+                    name: row.getElementsByClassName("flag-name")[0]?.innerText ?? null,
+                }));
+                """
+            )
             country_links = []
 
             for row in rows:
-                try:
-                    onclick = row.get_attribute("onclick")
-                    if onclick:
-                        match = re.search(r"window\.open\('([^']+)'", onclick)
-                        if match:
-                            path = match.group(1)
-                            full_url = urljoin(base_url, path)
-                            country_name = row.find_element(By.CLASS_NAME, "flag-name").text
-                            country_links.append({"url": full_url, "name": country_name})
-                except Exception as e:
-                    print(f"Error processing row: {e}")
-                    continue
+                onclick = row["onclick"]
+                if onclick:
+                    match = ONCLICK_RE.search(onclick)
+                    if match:
+                        if row["name"] is None:
+                            print(f"Error processing row: no country name for {onclick}")
+                            continue
+                        path = match.group(1)
+                        full_url = urljoin(base_url, path)
+                        country_links.append({"url": full_url, "name": row["name"]})
 
             return country_links
         except TimeoutException:
@@ -141,13 +188,24 @@ class GeoGuessrScraper:
                     "marginBottom": 0,
                     "marginLeft": 0,
                     "marginRight": 0,
+                    # Read the PDF in chunks rather than receiving it as one big base64 string
+                    "transferMode": "ReturnAsStream",
                 },
             )
 
             filepath = os.path.join(self.output_dir, filename)
-            pdf_data = base64.b64decode(pdf["data"])
-            with open(filepath, "wb") as f:
-                f.write(pdf_data)
+            try:
+                with open(filepath, "wb") as f:
+                    while True:
+                        chunk = self.driver.execute_cdp_cmd("IO.read", {"handle": pdf["stream"], "size": 1 << 16})
+                        if chunk.get("base64Encoded"):
+                            f.write(base64.b64decode(chunk["data"]))
+                        else:
+                            f.write(chunk["data"].encode())
+                        if chunk["eof"]:
+                            break
+            finally:
+                self.driver.execute_cdp_cmd("IO.close", {"handle": pdf["stream"]})
 
             print(f"Saved {filepath}")
             return True
@@ -155,6 +213,20 @@ class GeoGuessrScraper:
             print(f"Error saving PDF for {url}: {e}")
             return False
 
+    def save_country_as_pdf(self, url, filename):
+        """Save a country page as PDF, using a separate driver for each worker thread."""
+        worker = getattr(self._workers, "scraper", None)
+        if worker is None:
+            worker = GeoGuessrScraper(output_dir=self.output_dir)
+            worker.start_driver()
+            self._workers.scraper = worker
+            with self._worker_scrapers_lock:
+                self._worker_scrapers.append(worker)
+
+        result = worker.save_as_pdf(url, filename)
+        time.sleep(1)  # Be nice to the server
+        return result
+
     def process_all_pages(self, base_url):
         """Process the main guide page and all country subpages."""
         try:
@@ -168,16 +240,24 @@ class GeoGuessrScraper:
             country_links = self.get_country_links(base_url)
             print(f"Found {len(country_links)} country pages")
 
-            # Process each country page
-            for country in country_links:
-                filename = f"{country['name'].lower().replace(' ', '_')}.pdf"
-                self.save_as_pdf(country["url"], filename)
-                time.sleep(1)  # Be nice to the server
+            # Process the country pages in parallel
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    executor.submit(
+                        self.save_country_as_pdf, country["url"], f"{country['name'].lower().replace(' ', '_')}.pdf"
+                    )
+                    for country in country_links
+                ]
+                for future in as_completed(futures):
+                    future.result()
 
         except Exception as e:
             print(f"Error in main process: {e}")
         finally:
             self.driver.quit()
+            for worker in self._worker_scrapers:
+                worker.driver.quit()
+            self._worker_scrapers = []
 
 
 def main():
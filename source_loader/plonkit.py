@@ -1,34 +1,58 @@
 
 import asyncio
+import contextlib
+import hashlib
+import os
+import pickle
 import re
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Union
-from playwright.async_api import async_playwright, Page, Browser, ElementHandle
-from dataclasses import dataclass
+from playwright.async_api import async_playwright, Page, Browser, BrowserContext, Route
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from dataclasses import dataclass, field
 from PIL import Image
+import lxml.etree
+import lxml.html
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from io import BytesIO
+from urllib.parse import urljoin
 
 
-@dataclass
+@dataclass(slots=True)
 class ImageData:
-    """Represents an image with its source URL and optional Pillow object."""
+    """Represents an image with its source URL. The Pillow object is only downloaded on first use."""
     src_url: str
-    pillow_image: Optional[Image.Image] = None
+    _pillow_image: Optional[Image.Image] = field(default=None, init=False, repr=False, compare=False)
 
+    async def pil(self) -> Optional[Image.Image]:
+        """
+        Download the image if that hasn't happened yet and return it as a Pillow Image object.
 
-@dataclass
+        Returns:
+            PIL Image object or None if there is no source URL or the download fails
+        """
+        if self._pillow_image is None and self.src_url:
+            self._pillow_image = await download_image(self.src_url)
+        return self._pillow_image
+
+
+@dataclass(slots=True, frozen=True)
 class TextContentBlock:
     """A content block containing only text."""
     text: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ImageContentBlock:
     """A content block containing only an image."""
     image: ImageData
 
 
-@dataclass
+@dataclass(slots=True)
 class TextWithImageContentBlock:
     """A content block containing both text and an image with a link."""
     text: str
@@ -40,22 +64,123 @@ class TextWithImageContentBlock:
 StepContentBlock = Union[TextContentBlock, ImageContentBlock, TextWithImageContentBlock]
 
 
-@dataclass
+@dataclass(slots=True)
 class Step:
     """Represents a step with its title and content blocks."""
     title: str
     blocks: List[StepContentBlock]
 
 
-@dataclass
+@dataclass(slots=True)
 class PageData:
     """Represents the parsed data from a sub-page."""
     steps: List[Step]
 
 
+# Number of subpages processed at the same time, each in its own browser page if it needs to be rendered
+_SUBPAGE_WORKERS = 8
+
+# How long to wait for client-side rendered content after the DOM is loaded
+_CONTENT_WAIT_MS = 10_000
+
+# Resources the browser does not need to build the DOM; images are downloaded separately by download_image.
+# Stylesheets are still loaded, since innerText depends on them (hidden elements, line breaks between blocks).
+_BLOCKED_RESOURCE_TYPES = frozenset({'image', 'font', 'media'})
+
+# Parsed subpages are cached here, keyed by their URL and the validator (ETag or Last-Modified) of their current version
+_CACHE_DIR = os.path.join('.cache', 'plonkit')
+
+# Relative URLs found on plonkit.net are resolved against this
+_BASE_URL = 'https://www.plonkit.net/'
+
+# Number of images downloaded at the same time, limited to avoid overwhelming plonkit.net
+_DOWNLOAD_WORKERS = 16
+
+# Shared by all requests so connections to plonkit.net are kept alive between them. The pool is large enough for
+# every concurrent image download and sub-page fetch, and transient failures are retried with exponential backoff.
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_maxsize=_DOWNLOAD_WORKERS + _SUBPAGE_WORKERS,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=(429, 500, 502, 503, 504)),
+)
+_SESSION.mount('https://', _ADAPTER)
+_SESSION.mount('http://', _ADAPTER)
+
+# Dedicated to the blocking image downloads, so they neither compete with nor are limited by the other work that runs
+# in asyncio's default executor (sub-page fetches, cache files, decoding)
+_IO_POOL = ThreadPoolExecutor(max_workers=_DOWNLOAD_WORKERS, thread_name_prefix='plonkit-download')
+
+# Downloaded images by absolute URL, so images repeated across steps and subpages (flags, icons, ...) are fetched
+# only once. Only successfully decoded images are cached; failed downloads are tried again on the next request.
+_IMAGE_CACHE: OrderedDict[str, Image.Image] = OrderedDict()
+_IMAGE_CACHE_SIZE = 512
+
+# Downloads in progress by event loop and absolute URL, so concurrent requests for the same URL share one fetch.
+# Tasks are bound to the loop that created them and are removed as soon as they are done, however they end.
+_PENDING_DOWNLOADS: dict[tuple[asyncio.AbstractEventLoop, str], asyncio.Task[Optional[Image.Image]]] = {}
+
+# Matches: window.open('/parameter','_blank') or window.open("/parameter","_blank")
+_ONCLICK_RE = re.compile(r"window\.open\(['\"]([^'\"]+)['\"],\s*['\"]_blank['\"]")
+
+# Matches "Step [number] - [title]"
+_STEP_RE = re.compile(r'Step\s+\d+\s*[-–]\s*(.+)', re.IGNORECASE)
+
+
+# Reads everything needed to classify and parse a section in a single round-trip to the browser.
+# The heading is the first line of the first h1-h3 of the section (or of the section itself, if it has no heading),
+# which is all _STEP_RE needs to recognize a step header.
+_SECTION_CONTENT_JS = """
+(section) => {
+    const figureImg = section.querySelector('figure a img');
+    const img = figureImg || section.querySelector('img');
+    const figureLink = section.querySelector('figure a');
+    return {
+        heading: (section.querySelector('h1, h2, h3') || section).innerText.trim().split('\\n', 1)[0],
+        kind: figureImg ? 'text_with_image' : (img ? 'image' : 'text'),
+        img_src: img ? (img.getAttribute('src') || img.getAttribute('data-src')) : null,
+        link_href: figureLink ? figureLink.getAttribute('href') : null,
+        text: section.innerText,
+        links: [...section.querySelectorAll('a')].map(a => [a.innerText, a.getAttribute('href')]),
+    };
+}
+"""
+
+# Reads the data of all sections of an article in a single round-trip to the browser
+_ARTICLE_SECTIONS_JS = f"(article) => [...article.querySelectorAll('section')].map({_SECTION_CONTENT_JS.strip()})"
+
+# Block-level tags after which innerText starts a new line
+_BLOCK_TAGS = frozenset({
+    'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure', 'footer', 'h1',
+    'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'tr',
+    'ul',
+})
+
+# Collects the onclick attributes of all elements of a page in a single round-trip to the browser,
+# joined by a control character that never occurs in them
+_ONCLICK_VALUES_JS = (
+    "() => [...document.querySelectorAll('[onclick]')].map(e => e.getAttribute('onclick')).join('\\u0001')"
+)
+
+
+def _absolutize(url: Optional[str], page_url: str = _BASE_URL) -> str:
+    """
+    Resolve a URL found on plonkit.net against the page it was found on, handling every relative form.
+
+    Args:
+        url: The URL as found in the page
+        page_url: The URL of that page; in-page links like '#anchor' then resolve to the page itself
+
+    Returns:
+        The absolute URL, or an empty string if there is no URL
+    """
+    return urljoin(page_url, url) if url else ''
+
+
 async def download_image(url: str) -> Optional[Image.Image]:
     """
     Download an image from a URL and return it as a Pillow Image object.
+    The blocking download runs in a worker thread, so multiple downloads can be awaited concurrently.
+    Images are cached by URL, so each distinct image is only downloaded once.
 
     Args:
         url: The URL of the image to download
@@ -63,139 +188,249 @@ async def download_image(url: str) -> Optional[Image.Image]:
     Returns:
         PIL Image object or None if download fails
     """
+    url = _absolutize(url)
+
+    image = _IMAGE_CACHE.get(url)
+    if image is not None:
+        _IMAGE_CACHE.move_to_end(url)
+        return image
+
+    key = (asyncio.get_running_loop(), url)
+    task = _PENDING_DOWNLOADS.get(key)
+    if task is None:
+        task = asyncio.create_task(_download_and_decode_image(url))
+        _PENDING_DOWNLOADS[key] = task
+        task.add_done_callback(lambda _: _PENDING_DOWNLOADS.pop(key, None))
+
+    # Shielded, so a cancelled caller does not cancel the download for everyone else waiting on it
+    return await asyncio.shield(task)
+
+
+async def _download_and_decode_image(url: str) -> Optional[Image.Image]:
+    """
+    Download an image in _IO_POOL, then decode it in the default executor.
+    The download thread is released before decoding, so further downloads overlap with the CPU-bound decoding.
+    """
+    data = await asyncio.get_running_loop().run_in_executor(_IO_POOL, _download_image_sync, url)
+    if data is None:
+        return None
+    image = await asyncio.to_thread(_decode_image, url, data)
+
+    if image is not None:
+        _IMAGE_CACHE[url] = image
+        if len(_IMAGE_CACHE) > _IMAGE_CACHE_SIZE:
+            _IMAGE_CACHE.popitem(last=False)
+    return image
+
+
+def _download_image_sync(url: str) -> Optional[bytes]:
+    """
+    Blocking download of the raw bytes of an image, or None if the download fails.
+    """
     try:
-        # Make sure the URL is absolute
-        if url.startswith('//'):
-            url = 'https:' + url
-        elif url.startswith('/'):
-            url = 'https://www.plonkit.net' + url
+        with _SESSION.get(url, timeout=10) as response:
+            response.raise_for_status()
+            return response.content
 
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"Warning: Failed to download image from {url}: {e}")
+        return None
 
-        # Create PIL Image from response content
-        image = Image.open(BytesIO(response.content))
-        return image
+
+def _decode_image(url: str, data: bytes) -> Optional[Image.Image]:
+    """
+    Blocking decoding of a downloaded image, or None if it can't be decoded.
+    Pillow releases the GIL while decoding, so images decoded in different threads are decoded in parallel.
+    """
+    try:
+        # Decode the image right away and detach it from the buffer, so the raw bytes can be freed immediately
+        with Image.open(BytesIO(data)) as image:
+            image.load()
+            return image.copy()
 
     except Exception as e:
-        print(f"Warning: Failed to download image from {url}: {e}")
+        print(f"Warning: Failed to decode image from {url}: {e}")
         return None
 
 
-async def extract_text_with_link_replacement(element: ElementHandle) -> str:
+def _replace_link_texts(text: str, links: List[List[Optional[str]]], page_url: str) -> str:
     """
-    Extract text from an element, replacing <a> tag content with their href URLs.
+    Replace the text of links within a text by their absolute URLs.
 
     Args:
-        element: The Playwright element to extract text from
+        text: The text of an element
+        links: Pairs of link text and href of all <a> tags within the element
+        page_url: The URL of the page the element is on
 
     Returns:
         Text with link replacements
     """
-    # Get all anchor tags within the element
-    links = await element.query_selector_all('a')
-
     # Build a mapping of link text to URLs
     link_replacements = {}
-    for link in links:
-        href = await link.get_attribute('href')
-        text = await link.inner_text()
-        if href and text:
-            # Make href absolute if needed
-            if href.startswith('/'):
-                href = 'https://www.plonkit.net' + href
-            elif href.startswith('//'):
-                href = 'https:' + href
-            link_replacements[text] = href
+    for link_text, href in links:
+        if href and link_text:
+            link_replacements[link_text] = _absolutize(href, page_url)
 
-    # Get the full text
-    full_text = await element.inner_text()
+    # Replace link text with URLs in a single pass, trying longer link texts first so they win over their substrings
+    if link_replacements:
+        pattern = re.compile('|'.join(map(re.escape, sorted(link_replacements, key=len, reverse=True))))
+        text = pattern.sub(lambda match: link_replacements[match.group(0)], text)
 
-    # Replace link text with URLs
-    for text, url in link_replacements.items():
-        full_text = full_text.replace(text, url)
+    return text.strip()
 
-    return full_text.strip()
 
-
-async def parse_step_content_section(section_element: ElementHandle) -> StepContentBlock:
+def _content_block_from_data(data: dict, page_url: str) -> StepContentBlock:
     """
-    Parse a content section into the appropriate StepContentBlock type.
-    Handles three types: text-only, image-only, and text-with-image.
+    Build the StepContentBlock of a section from the data read from it.
 
     Args:
-        section_element: The Playwright element representing a section
+        data: The section data, as returned by _SECTION_CONTENT_JS or _section_data_from_html
+        page_url: The URL of the page the section is on
 
     Returns:
         A StepContentBlock of the appropriate type
     """
-    # Check for figure > a > img pattern (text with image)
-    figure_link_img = await section_element.query_selector('figure a img')
+    # Make URLs absolute
+    img_src = _absolutize(data['img_src'], page_url)
+    image_link_url = _absolutize(data['link_href'], page_url)
 
-    if figure_link_img:
+    if data['kind'] == 'text_with_image':
         # Type 3: Text with image
-        # Get the image source
-        img_src = await figure_link_img.get_attribute('src')
-        if not img_src:
-            img_src = await figure_link_img.get_attribute('data-src')  # Fallback for lazy loading
+        # Create image data (the image itself is only downloaded when it is needed)
+        return TextWithImageContentBlock(
+            text=_replace_link_texts(data['text'], data['links'], page_url),
+            image=ImageData(src_url=img_src),
+            image_link_url=image_link_url
+        )
 
-        # Get the link URL (from the parent <a> element)
-        link_element = await section_element.query_selector('figure a')
-        image_link_url = await link_element.get_attribute('href') if link_element else ''
+    if data['kind'] == 'image':
+        # Type 2: Image only
+        return ImageContentBlock(image=ImageData(src_url=img_src))
 
-        # Make URLs absolute
-        if img_src and img_src.startswith('/'):
-            img_src = 'https://www.plonkit.net' + img_src
-        elif img_src and img_src.startswith('//'):
-            img_src = 'https:' + img_src
+    # Type 1: Text only (default case)
+    return TextContentBlock(text=_replace_link_texts(data['text'], data['links'], page_url))
 
-        if image_link_url and image_link_url.startswith('/'):
-            image_link_url = 'https://www.plonkit.net' + image_link_url
-        elif image_link_url and image_link_url.startswith('//'):
-            image_link_url = 'https:' + image_link_url
 
-        # Download the image
-        pillow_image = await download_image(img_src) if img_src else None
+def _inner_text(element: lxml.html.HtmlElement) -> str:
+    """
+    Approximate the browser's innerText of a parsed HTML element.
 
-        # Extract text with link replacements
-        text_content = await extract_text_with_link_replacement(section_element)
+    Args:
+        element: The lxml element to extract text from
 
-        # Create image data
-        image_data = ImageData(src_url=img_src or '', pillow_image=pillow_image)
+    Returns:
+        The text of the element, with one line per block-level element
+    """
+    parts: List[str] = []
+
+    def collect(el: lxml.html.HtmlElement) -> None:
+        if not isinstance(el.tag, str) or el.tag in ('script', 'style'):
+            return
+        if el.tag == 'br':
+            parts.append('\n')
+            return
+        if el.text:
+            parts.append(el.text)
+        for child in el:
+            collect(child)
+            if child.tail:
+                parts.append(child.tail)
+        if el.tag in _BLOCK_TAGS:
+            parts.append('\n')
+
+    collect(element)
+    lines = (' '.join(line.split()) for line in ''.join(parts).split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def _section_data_from_html(section: lxml.html.HtmlElement) -> dict:
+    """
+    Read the same data from a parsed section as _SECTION_CONTENT_JS does in the browser.
 
-        return TextWithImageContentBlock(
-            text=text_content,
-            image=image_data,
-            image_link_url=image_link_url or ''
-        )
+    Args:
+        section: The lxml element representing a section
 
-    # Check for standalone image (not in figure > a > img pattern)
-    standalone_img = await section_element.query_selector('img')
+    Returns:
+        The section data
+    """
+    figure_imgs = section.xpath('.//figure//a//img')
+    imgs = figure_imgs or section.xpath('.//img')
+    figure_links = section.xpath('.//figure//a')
+    headings = section.xpath('.//h1 | .//h2 | .//h3')
+    heading_lines = _inner_text(headings[0] if headings else section).split('\n', 1)
+    return {
+        'heading': heading_lines[0],
+        'kind': 'text_with_image' if figure_imgs else ('image' if imgs else 'text'),
+        'img_src': (imgs[0].get('src') or imgs[0].get('data-src')) if imgs else None,
+        'link_href': figure_links[0].get('href') if figure_links else None,
+        'text': _inner_text(section),
+        'links': [[_inner_text(a), a.get('href')] for a in section.iter('a')],
+    }
+
+
+def _build_steps(sections_data: List[dict], page_url: str) -> List[Step]:
+    """
+    Group the sections of an article into steps.
 
-    if standalone_img:
-        # Type 2: Image only
-        img_src = await standalone_img.get_attribute('src')
-        if not img_src:
-            img_src = await standalone_img.get_attribute('data-src')  # Fallback for lazy loading
+    Args:
+        sections_data: The data of all sections of the article, in document order
+        page_url: The URL of the page the article is on
+
+    Returns:
+        The steps with their content blocks
+    """
+    steps: List[Step] = []
+    current_step: Optional[Step] = None
+
+    for data in sections_data:
+        # Check if this section defines a new step
+        step_match = _STEP_RE.match(data['heading'].strip())
+
+        if step_match:
+            # This is a step header - save the previous step if it exists
+            if current_step is not None:
+                steps.append(current_step)
 
-        # Make URL absolute
-        if img_src and img_src.startswith('/'):
-            img_src = 'https://www.plonkit.net' + img_src
-        elif img_src and img_src.startswith('//'):
-            img_src = 'https:' + img_src
+            # Start a new step
+            current_step = Step(title=step_match.group(1).strip(), blocks=[])
 
-        # Download the image
-        pillow_image = await download_image(img_src) if img_src else None
+        elif current_step is not None:
+            # This is a content section of the current step
+            current_step.blocks.append(_content_block_from_data(data, page_url))
 
-        # Create image data
-        image_data = ImageData(src_url=img_src or '', pillow_image=pillow_image)
+    # Don't forget to add the last step
+    if current_step is not None:
+        steps.append(current_step)
 
-        return ImageContentBlock(image=image_data)
+    return steps
 
-    # Type 1: Text only (default case)
-    text_content = await extract_text_with_link_replacement(section_element)
 
-    return TextContentBlock(text=text_content)
+async def _block_unneeded_resources(route: Route) -> None:
+    """
+    Route handler that aborts requests for resources in _BLOCKED_RESOURCE_TYPES and lets all others through.
+
+    Args:
+        route: The intercepted route
+    """
+    if route.request.resource_type in _BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def _wait_for_selector(page: Page, selector: str) -> None:
+    """
+    Wait until an element matching the selector is attached to the page, giving up silently after _CONTENT_WAIT_MS.
+
+    Args:
+        page: The Playwright page to wait on
+        selector: The CSS selector to wait for
+    """
+    try:
+        await page.wait_for_selector(selector, state='attached', timeout=_CONTENT_WAIT_MS)
+    except PlaywrightTimeoutError:
+        pass
+
 
 async def extract_onclick_parameters(page: Page, url: str) -> list[str]:
     """
@@ -209,34 +444,17 @@ async def extract_onclick_parameters(page: Page, url: str) -> list[str]:
     Returns:
         List of extracted parameters (strings)
     """
-    parameters: List[str] = []
-
     # Navigate to the URL
-    await page.goto(url)
-
-    # Wait for the page to load completely
-    await page.wait_for_load_state('networkidle')
-
-    # Find all elements with onclick attributes
-    elements = await page.query_selector_all('[onclick]')
+    await page.goto(url, wait_until='domcontentloaded')
 
-    # Regular expression to match the pattern and extract the first parameter
-    # This matches: window.open('/parameter','_blank') or window.open("/parameter","_blank")
-    pattern = re.compile(r"window\.open\(['\"]([^'\"]+)['\"],\s*['\"]_blank['\"]")
+    # Wait for the links to be rendered; plonkit rarely reaches networkidle because of its analytics
+    await _wait_for_selector(page, '[onclick]')
 
-    for element in elements:
-        onclick_value = await element.get_attribute('onclick')
-        if onclick_value:
-            match = pattern.search(onclick_value)
-            if match:
-                # Extract the parameter (remove leading slash if present)
-                parameter = match.group(1)
-                if parameter.startswith('/'):
-                    parameter = parameter[1:]
-                parameters.append(parameter)
+    # Read the onclick attributes of all elements at once and scan them in a single pass
+    onclick_values: str = await page.evaluate(_ONCLICK_VALUES_JS)
 
-
-    return parameters
+    # Extract the parameters (remove leading slash if present)
+    return [match.group(1).removeprefix('/') for match in _ONCLICK_RE.finditer(onclick_values)]
 
 
 async def parse_subpage(page: Page, subpage_url: str) -> PageData:
@@ -250,8 +468,8 @@ async def parse_subpage(page: Page, subpage_url: str) -> PageData:
     Returns:
         PageData containing the parsed steps and their content blocks
     """
-    await page.goto(subpage_url)
-    await page.wait_for_load_state('networkidle')
+    await page.goto(subpage_url, wait_until='domcontentloaded')
+    await _wait_for_selector(page, 'body main article section')
 
     # Find the main article content
     article = await page.query_selector('body main article')
@@ -259,72 +477,162 @@ async def parse_subpage(page: Page, subpage_url: str) -> PageData:
         print(f"Warning: Could not find main article content on {subpage_url}")
         return PageData(steps=[])
 
-    # Get all section children
-    sections = await article.query_selector_all('section')
+    # Read all sections at once and build the steps locally
+    sections_data = await article.evaluate(_ARTICLE_SECTIONS_JS)
+    steps = _build_steps(sections_data, page.url)
 
-    steps: List[Step] = []
-    current_step: Optional[Step] = None
-
-    # Pattern to match "Step [number] - [title]"
-    step_pattern = re.compile(r'Step\s+\d+\s*[-–]\s*(.+)', re.IGNORECASE)
+    return PageData(steps=steps)
 
-    for section in sections:
-        section_text = (await section.inner_text()).strip()
 
-        # Check if this section defines a new step
-        step_match = step_pattern.match(section_text)
+async def parse_subpage_fast(subpage_url: str) -> Optional[PageData]:
+    """
+    Parses a sub-page from its static HTML, without rendering it in the browser.
 
-        if step_match:
-            # This is a step header - save the previous step if it exists
-            if current_step is not None:
-                steps.append(current_step)
+    Args:
+        subpage_url: The URL of the sub-page to parse
 
-            # Start a new step
-            step_title = step_match.group(1).strip()
-            current_step = Step(title=step_title, blocks=[])
+    Returns:
+        PageData containing the parsed steps and their content blocks,
+        or None if the static HTML does not contain the steps (e.g. because they are rendered by JavaScript)
+    """
+    try:
+        response = await asyncio.to_thread(_SESSION.get, subpage_url, timeout=10)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"Warning: Failed to fetch {subpage_url}: {e}")
+        return None
 
-        else:
-            # This is a content section
-            if current_step is not None:
-                # Parse the content section and add it to the current step
-                content_block = await parse_step_content_section(section)
-                current_step.blocks.append(content_block)
-            else:
-                # Content section found before any step header - could be intro content
-                #print(f"Warning: Found content section before step header on {subpage_url}")
-                pass
+    try:
+        tree = lxml.html.fromstring(response.content)
+    except lxml.etree.ParserError:
+        # E.g. an empty body; leave the page to the browser
+        return None
+    articles = tree.xpath('//body//main//article')
+    if not articles:
+        return None
 
-    # Don't forget to add the last step
-    if current_step is not None:
-        steps.append(current_step)
+    sections_data = [_section_data_from_html(section) for section in articles[0].iter('section')]
+    steps = _build_steps(sections_data, response.url)
+    if not steps:
+        return None
 
     return PageData(steps=steps)
 
 
-async def process_all_subpages(base_url: str) -> dict[str, PageData]:
+def _page_cache_path(subpage_url: str) -> Optional[str]:
+    """
+    Determine the cache file of the current version of a sub-page.
+
+    Args:
+        subpage_url: The URL of the sub-page
+
+    Returns:
+        The path of the cache file, or None if the sub-page has no ETag or Last-Modified header to key it by
+    """
+    try:
+        response = _SESSION.head(subpage_url, timeout=10, allow_redirects=True)
+        response.raise_for_status()
+    except requests.RequestException:
+        return None
+
+    validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+    if not validator:
+        return None
+
+    key = hashlib.sha1(f'{subpage_url}\n{validator}'.encode()).hexdigest()
+    return os.path.join(_CACHE_DIR, f'{key}.pickle')
+
+
+def _load_cached_page(cache_path: str) -> Optional[PageData]:
+    """
+    Load a cached sub-page.
+
+    Args:
+        cache_path: The path of the cache file
+
+    Returns:
+        The cached PageData, or None if there is none or it can't be read
+    """
+    try:
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, TypeError):
+        return None
+
+
+def _store_cached_page(cache_path: str, page_data: PageData) -> None:
+    """
+    Store a parsed sub-page in the cache.
+
+    Args:
+        cache_path: The path of the cache file
+        page_data: The parsed sub-page
+    """
+    os.makedirs(_CACHE_DIR, exist_ok=True)
+    # Write to a temporary file first so an interrupted run never leaves a truncated cache file behind
+    fd, temp_path = tempfile.mkstemp(dir=_CACHE_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(page_data, f)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: Failed to cache {cache_path}: {e}")
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+
+
+async def process_all_subpages(base_url: str, use_cache: bool = True) -> dict[str, PageData]:
     """
     Extracts onclick parameters from the main page and processes all sub-pages.
+    Parsed sub-pages are cached on disk until the server reports a new version of them.
 
     Args:
         base_url: The base URL to start from
+        use_cache: Whether to reuse cached sub-pages (they are cached either way)
 
     Returns:
         Dictionary mapping parameter names to their parsed PageData
     """
-    results: dict[str, PageData] = {}
-
     async with async_playwright() as playwright:
         browser: Browser = await playwright.chromium.launch(headless=True)
 
         try:
-            page: Page = await browser.new_page()
+            context: BrowserContext = await browser.new_context(java_script_enabled=True)
+            await context.route('**/*', _block_unneeded_resources)
+            page: Page = await context.new_page()
             parameters = await extract_onclick_parameters(page, base_url)
-
-            for param in parameters[0:1]:
-                print(param)
-                subpage_url = f"https://www.plonkit.net/{param}"
-                page_data = await parse_subpage(page, subpage_url)
-                results[param] = page_data
+            await page.close()
+
+            semaphore = asyncio.Semaphore(_SUBPAGE_WORKERS)
+
+            async def process_subpage(param: str) -> PageData:
+                async with semaphore:
+                    print(param)
+                    subpage_url = f"https://www.plonkit.net/{param}"
+
+                    cache_path = await asyncio.to_thread(_page_cache_path, subpage_url)
+                    if use_cache and cache_path is not None:
+                        page_data = await asyncio.to_thread(_load_cached_page, cache_path)
+                        if page_data is not None:
+                            return page_data
+
+                    # Only render the page in the browser if its static HTML is not enough
+                    page_data = await parse_subpage_fast(subpage_url)
+                    if page_data is None:
+                        subpage = await context.new_page()
+                        try:
+                            page_data = await parse_subpage(subpage, subpage_url)
+                        finally:
+                            await subpage.close()
+
+                    if cache_path is not None:
+                        await asyncio.to_thread(_store_cached_page, cache_path, page_data)
+                    return page_data
+
+            # If one sub-page fails, the task group cancels the others instead of leaving them running
+            async with asyncio.TaskGroup() as task_group:
+                tasks = {param: task_group.create_task(process_subpage(param)) for param in parameters}
+            results = {param: task.result() for param, task in tasks.items()}
 
         finally:
             await browser.close()